@@ -0,0 +1,223 @@
+"""Admission control for uploads so catalog reads keep a share of the workers"""
+import functools
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import jsonify, request
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: only the per-process cap applies
+    fcntl = None
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+# Capacity of the whole service (gunicorn sets WEB_CONCURRENCY on Render)
+WEB_CONCURRENCY = _env_int('WEB_CONCURRENCY', 1)
+GUNICORN_THREADS = _env_int('GUNICORN_THREADS', 1)
+
+# Request slots that uploads may never take, so / and /videos stay responsive
+CATALOG_RESERVED_SLOTS = _env_int('CATALOG_RESERVED_SLOTS', 1)
+
+UPLOAD_MAX_INFLIGHT_PER_PROCESS = _env_int(
+    'UPLOAD_MAX_INFLIGHT_PER_PROCESS',
+    max(1, GUNICORN_THREADS - CATALOG_RESERVED_SLOTS))
+UPLOAD_MAX_INFLIGHT_GLOBAL = _env_int(
+    'UPLOAD_MAX_INFLIGHT_GLOBAL',
+    max(1, WEB_CONCURRENCY * GUNICORN_THREADS - CATALOG_RESERVED_SLOTS))
+UPLOAD_SLOT_DIR = os.environ.get(
+    'UPLOAD_SLOT_DIR', os.path.join(tempfile.gettempdir(), 'tawa-upload-slots'))
+# Token buckets live next to the slot files so every worker draws from the same budget
+UPLOAD_RATE_DB = os.path.join(UPLOAD_SLOT_DIR, 'rate-limits.db')
+
+# Per-client token bucket: sustained uploads per minute plus a small burst
+UPLOAD_RATE_PER_MINUTE = float(os.environ.get('UPLOAD_RATE_PER_MINUTE', 6))
+UPLOAD_BURST = float(os.environ.get('UPLOAD_BURST', 3))
+UPLOAD_BUSY_RETRY_AFTER = _env_int('UPLOAD_BUSY_RETRY_AFTER', 10)
+
+_MAX_TRACKED_CLIENTS = 10000
+
+_local_slots = threading.BoundedSemaphore(UPLOAD_MAX_INFLIGHT_PER_PROCESS)
+_buckets = {}
+_buckets_lock = threading.Lock()
+_stats = {
+    'admitted': 0,
+    'shed_rate_limited': 0,
+    'shed_busy': 0,
+    'inflight': 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name, delta=1):
+    with _stats_lock:
+        _stats[name] += delta
+
+
+def client_id():
+    """Best guess at the caller's address behind Render's proxy"""
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    if forwarded:
+        # The proxy appends the address it saw; earlier entries are client-supplied
+        return forwarded.split(',')[-1].strip()
+    return request.remote_addr or 'unknown'
+
+
+def _refill(tokens, updated, now):
+    """Top a bucket up for the time since it was last touched"""
+    rate = UPLOAD_RATE_PER_MINUTE / 60.0
+    return min(UPLOAD_BURST, tokens + max(0.0, now - updated) * rate)
+
+
+def _spend(tokens):
+    """Returns (tokens left, seconds to wait); the wait is 0 when a token was spent"""
+    if tokens < 1:
+        return tokens, (1 - tokens) / (UPLOAD_RATE_PER_MINUTE / 60.0)
+    return tokens - 1, 0
+
+
+def _take_token_shared(client, now):
+    conn = sqlite3.connect(UPLOAD_RATE_DB, timeout=5, isolation_level=None)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets "
+                     "(client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        # Take the write lock up front so two workers can't spend the same token
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT tokens, updated FROM buckets WHERE client = ?", (client,)).fetchone()
+        tokens = _refill(*row, now) if row else UPLOAD_BURST
+        tokens, wait = _spend(tokens)
+        conn.execute("INSERT OR REPLACE INTO buckets (client, tokens, updated) VALUES (?, ?, ?)",
+                     (client, tokens, now))
+        if random.random() < 0.01:
+            # Forget clients whose bucket would be full again anyway
+            refill = UPLOAD_BURST / (UPLOAD_RATE_PER_MINUTE / 60.0)
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (now - refill,))
+        conn.execute("COMMIT")
+        return wait
+    finally:
+        conn.close()
+
+
+def _take_token_local(client, now):
+    with _buckets_lock:
+        tokens, updated = _buckets.get(client, (UPLOAD_BURST, now))
+        tokens, wait = _spend(_refill(tokens, updated, now))
+        _buckets[client] = (tokens, now)
+
+        if len(_buckets) > _MAX_TRACKED_CLIENTS:
+            refill = UPLOAD_BURST / (UPLOAD_RATE_PER_MINUTE / 60.0)
+            for key in [k for k, (_, t) in _buckets.items() if now - t > refill]:
+                del _buckets[key]
+        return wait
+
+
+def take_token(client, now=None):
+    """Spend one upload token for client; returns seconds to wait if none are left
+
+    The bucket is shared by all workers on the machine; if the shared store
+    can't be opened, this worker falls back to its own bucket.
+    """
+    if UPLOAD_RATE_PER_MINUTE <= 0:
+        return 0
+    # Wall-clock time, since the buckets are compared across processes
+    now = time.time() if now is None else now
+    try:
+        os.makedirs(UPLOAD_SLOT_DIR, exist_ok=True)
+        return _take_token_shared(client, now)
+    except (OSError, sqlite3.Error) as e:
+        print("⚠️ Shared rate limit store unavailable, limiting per process:", e)
+        return _take_token_local(client, now)
+
+
+def _acquire_global_slot():
+    """Lock one of the shared slot files; returns its fd, -1 if unenforced, None if full"""
+    if fcntl is None:
+        return -1
+
+    os.makedirs(UPLOAD_SLOT_DIR, exist_ok=True)
+    for index in range(UPLOAD_MAX_INFLIGHT_GLOBAL):
+        path = os.path.join(UPLOAD_SLOT_DIR, f'slot-{index}')
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # The kernel drops the lock if the worker dies, so slots never leak
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            os.close(fd)
+    return None
+
+
+def _release_global_slot(fd):
+    if fd >= 0:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _shed(status, message, retry_after, counter):
+    _count(counter)
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    # Tell the client to stop sending the body we are not going to read
+    response.headers['Connection'] = 'close'
+    return response
+
+
+def limit_uploads(view):
+    """Admit the wrapped upload view only when the client and the server have budget"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _local_slots.acquire(blocking=False):
+            return _shed(503, 'Server is busy with other uploads, try again shortly.',
+                         UPLOAD_BUSY_RETRY_AFTER, 'shed_busy')
+
+        try:
+            fd = _acquire_global_slot()
+        except OSError as e:
+            print("⚠️ Upload slot dir unavailable, using per-process limit only:", e)
+            fd = -1
+        if fd is None:
+            _local_slots.release()
+            return _shed(503, 'Server is busy with other uploads, try again shortly.',
+                         UPLOAD_BUSY_RETRY_AFTER, 'shed_busy')
+
+        # Only charge the client once we know we can actually serve the upload
+        wait = take_token(client_id())
+        if wait:
+            _release_global_slot(fd)
+            _local_slots.release()
+            return _shed(429, 'Too many uploads, please slow down.',
+                         max(1, int(wait + 0.999)), 'shed_rate_limited')
+
+        _count('admitted')
+        _count('inflight')
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _count('inflight', -1)
+            _release_global_slot(fd)
+            _local_slots.release()
+    return wrapper
+
+
+def stats():
+    """Admission counters for this worker process"""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot['pid'] = os.getpid()
+    snapshot['limits'] = {
+        'max_inflight_per_process': UPLOAD_MAX_INFLIGHT_PER_PROCESS,
+        'max_inflight_global': UPLOAD_MAX_INFLIGHT_GLOBAL if fcntl else None,
+        'catalog_reserved_slots': CATALOG_RESERVED_SLOTS,
+        'rate_per_minute': UPLOAD_RATE_PER_MINUTE,
+        'burst': UPLOAD_BURST,
+    }
+    return snapshot
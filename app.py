@@ -1,9 +1,20 @@
 import os
-import boto3
-from flask import Flask, render_template, request, jsonify
+import json
+import base64
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+import mimetypes
+import tempfile
+from flask import Flask, render_template, request, jsonify, redirect, Response, g, abort
 import sqlite3
+from werkzeug.http import quote_etag
 from werkzeug.utils import secure_filename
-from botocore.exceptions import ClientError
+
+import admission
+import faststart
+import profiling
+from origin_cache import OriginCache
 
 app = Flask(__name__)
 
@@ -11,18 +22,67 @@ app = Flask(__name__)
 AWS_BUCKET_NAME = os.environ.get('AWS_BUCKET_NAME', 'tawa-streaming')
 AWS_REGION = 'eu-north-1'  # Stockholm region
 
+# Catalog cache: /videos and the home page are served from memory and
+# refreshed after an upload or once the TTL runs out (other workers catch up
+# on their next refresh)
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', 30))
+CATALOG_FIRST_PAGE_SIZE = int(os.environ.get('CATALOG_FIRST_PAGE_SIZE', 24))
+
+# Origin cache: serve /stream/<id> from a local disk copy of hot S3 objects
+ORIGIN_CACHE_ENABLED = os.environ.get('ORIGIN_CACHE_ENABLED', '').lower() in ('1', 'true', 'yes')
+ORIGIN_CACHE_DIR = os.environ.get('ORIGIN_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'tawa-origin-cache'))
+ORIGIN_CACHE_MAX_MB = int(os.environ.get('ORIGIN_CACHE_MAX_MB', 2048))
+ORIGIN_CACHE_BLOCK_KB = int(os.environ.get('ORIGIN_CACHE_BLOCK_KB', 1024))
+DATABASE_PATH = os.environ.get('DATABASE_PATH', 'tawa.db')
+
+def create_s3_client():
+    """Build an S3 client; each worker process needs its own"""
+    # boto3 costs hundreds of milliseconds to import, so only pay for it when S3 is used
+    import boto3
+    return boto3.client(
+        's3',
+        aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+        region_name=AWS_REGION,
+        # Point at a local S3 stand-in (MinIO, moto server) for development
+        endpoint_url=os.environ.get('AWS_S3_ENDPOINT_URL') or None
+    )
+
+_s3_client = None
+_s3_client_pid = None
+_s3_client_lock = threading.Lock()
+
+def get_s3_client():
+    """The S3 client for this process, created on first use"""
+    global _s3_client, _s3_client_pid
+    # A client inherited across fork would share its connection pool with the parent
+    if _s3_client is None or _s3_client_pid != os.getpid():
+        with _s3_client_lock:
+            if _s3_client is None or _s3_client_pid != os.getpid():
+                # boto3 clients are safe to share between threads once built
+                _s3_client = create_s3_client()
+                _s3_client_pid = os.getpid()
+    return _s3_client
+
+origin_cache = None
+if ORIGIN_CACHE_ENABLED:
+    origin_cache = OriginCache(
+        get_s3_client,
+        AWS_BUCKET_NAME,
+        ORIGIN_CACHE_DIR,
+        max_bytes=ORIGIN_CACHE_MAX_MB * 1024 * 1024,
+        block_size=ORIGIN_CACHE_BLOCK_KB * 1024
+    )
 
-# Initialize S3 client
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-    region_name=AWS_REGION
-)
+def get_db():
+    """Open a database connection for the caller's thread"""
+    # One short-lived connection per use keeps sqlite3 objects off shared threads;
+    # the timeout lets concurrent workers wait out each other's writes
+    return sqlite3.connect(DATABASE_PATH, timeout=10)
 
 def fix_database():
     """Add missing columns to existing database"""
-    conn = sqlite3.connect('tawa.db')
+    conn = get_db()
     c = conn.cursor()
     try:
         # Check if s3_key column exists
@@ -33,11 +93,30 @@ def fix_database():
             c.execute("ALTER TABLE videos ADD COLUMN s3_key TEXT")
             print("✅ Added missing s3_key column to existing database")
         
+        if 'faststart' not in columns:
+            # NULL = not an MP4/MOV, or uploaded before we checked
+            c.execute("ALTER TABLE videos ADD COLUMN faststart INTEGER")
+            print("✅ Added faststart column to existing database")
+        
+        if 'size_bytes' not in columns:
+            c.execute("ALTER TABLE videos ADD COLUMN size_bytes INTEGER")
+            print("✅ Added size_bytes column to existing database")
+        
         if 'category' not in columns:
             c.execute("ALTER TABLE videos ADD COLUMN category TEXT DEFAULT 'General'")
             print("✅ Added category column to existing database")
         else:
             print("✅ All columns already exist")
+        
+        # Rows from before categories (or with a blank one) belong to General
+        c.execute("UPDATE videos SET category = 'General' WHERE category IS NULL OR TRIM(category) = ''")
+        if c.rowcount:
+            print(f"✅ Filed {c.rowcount} uncategorised videos under General")
+        
+        # Indexes behind the admin listings (keyset pagination) and aggregates
+        c.execute("CREATE INDEX IF NOT EXISTS idx_videos_upload_date ON videos (upload_date, id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_videos_title ON videos (title, id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_videos_category_size ON videos (category, size_bytes)")
             
     except Exception as e:
         print("Error checking/adding columns:", e)
@@ -48,8 +127,10 @@ def fix_database():
 
 # Initialize database
 def init_db():
-    conn = sqlite3.connect('tawa.db')
+    conn = get_db()
     c = conn.cursor()
+    # WAL lets catalog reads carry on while an upload is being recorded
+    c.execute("PRAGMA journal_mode=WAL")
     c.execute('''
         CREATE TABLE IF NOT EXISTS videos
         (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -64,6 +145,23 @@ def init_db():
     # Call the fix function
     fix_database()
 
+@app.before_request
+def start_profiling():
+    g.profile = profiling.maybe_start()
+
+@app.after_request
+def tag_profiled_response(response):
+    if g.get('profile') is not None:
+        g.profile['status'] = response.status_code
+        response.headers['X-Profile-Id'] = g.profile['id']
+    return response
+
+@app.teardown_request
+def finish_profiling(exc):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiling.finish(profile, profile.get('status', 500 if exc else None))
+
 def allowed_file(filename):
     allowed_extensions = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
     return '.' in filename and \
@@ -74,7 +172,7 @@ def force_fix_db():
     fix_database()
     
     # Check if fix worked
-    conn = sqlite3.connect('tawa.db')
+    conn = get_db()
     c = conn.cursor()
     try:
         c.execute("SELECT id, title, filename, s3_key, upload_date FROM videos LIMIT 1")
@@ -83,14 +181,146 @@ def force_fix_db():
         result = f"❌ Still broken: {e}"
     conn.close()
     
+    filled, missing = backfill_sizes()
+    result += f" Sizes filled in for {filled} videos ({missing} could not be read from S3)."
     return result
+
+def backfill_sizes():
+    """Look up size_bytes in S3 for videos uploaded before we recorded it; returns (filled, failed)"""
+    from botocore.exceptions import BotoCoreError, ClientError
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT id, s3_key FROM videos WHERE size_bytes IS NULL AND s3_key IS NOT NULL")
+    rows = c.fetchall()
+    conn.close()
+
+    sizes, failed = [], 0
+    for video_id, s3_key in rows:
+        try:
+            head = get_s3_client().head_object(Bucket=AWS_BUCKET_NAME, Key=s3_key)
+            sizes.append((head['ContentLength'], video_id))
+        except (ClientError, BotoCoreError) as e:
+            print(f"⚠️ No size for video {video_id}:", e)
+            failed += 1
+
+    if sizes:
+        conn = get_db()
+        conn.executemany("UPDATE videos SET size_bytes = ? WHERE id = ?", sizes)
+        conn.commit()
+        conn.close()
+    print(f"✅ Backfilled size_bytes for {len(sizes)} videos, {failed} failed")
+    return len(sizes), failed
+
+# Catalog cache
+def load_catalog(limit=None):
+    """Read the newest `limit` videos (all of them when limit is None) from the database"""
+    conn = get_db()
+    c = conn.cursor()
+    query = "SELECT id, title, filename, s3_key, upload_date, faststart FROM videos ORDER BY upload_date DESC"
+    if limit is None:
+        c.execute(query)
+    else:
+        c.execute(query + " LIMIT ?", (limit,))
+    videos = c.fetchall()
+    conn.close()
+
+    video_list = []
+    for video in videos:
+        # Generate S3 URL for each video
+        s3_url = f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{video[3]}"  # s3_key is at index 3
+
+        entry = {
+            'id': video[0],        # id
+            'title': video[1],     # title
+            'filename': video[2],  # filename
+            's3_url': s3_url,      # generated URL
+            'upload_date': video[4], # upload_date at index 4
+            'faststart': None if video[5] is None else bool(video[5])
+        }
+        if origin_cache is not None:
+            entry['stream_url'] = f"/stream/{video[0]}"
+        video_list.append(entry)
+    return video_list
+
+def catalog_version():
+    """Changes whenever a video is added or removed, without reading the rows"""
+    conn = get_db()
+    try:
+        count, max_id = conn.execute("SELECT COUNT(*), MAX(id) FROM videos").fetchone()
+    finally:
+        conn.close()
+    return f'{max_id or 0}.{count}'
+
+# One entry per page size asked for (None = the whole catalog)
+_catalog_cache = {}
+_catalog_refreshing = set()
+_catalog_lock = threading.Lock()
+_catalog_generation = 0
+_CATALOG_MAX_PAGES = 8
+
+def catalog_page(limit=None):
+    """First `limit` videos (all when falsy) and the ETag for that slice"""
+    key = limit if limit and limit > 0 else None
+    with _catalog_lock:
+        entry = _catalog_cache.get(key)
+        if entry is not None:
+            fresh = time.monotonic() - entry['loaded_at'] < CATALOG_CACHE_TTL
+            # While one thread reloads, everyone else keeps getting the stale copy
+            if fresh or key in _catalog_refreshing:
+                return entry['videos'], entry['etag']
+        _catalog_refreshing.add(key)
+        generation = _catalog_generation
+
+    # Database work happens outside the lock so a slow reload never blocks readers
+    try:
+        version = catalog_version()
+        if entry is not None and entry['version'] == version:
+            videos = entry['videos']
+        else:
+            videos = load_catalog(key)
+        entry = {
+            'videos': videos,
+            'version': version,
+            'etag': f'{version}-{key or "all"}',
+            'loaded_at': time.monotonic()
+        }
+        with _catalog_lock:
+            # An upload that landed mid-reload may be missing from what we read
+            if generation == _catalog_generation:
+                if len(_catalog_cache) >= _CATALOG_MAX_PAGES and key not in _catalog_cache:
+                    _catalog_cache.clear()
+                _catalog_cache[key] = entry
+    finally:
+        with _catalog_lock:
+            _catalog_refreshing.discard(key)
+    return entry['videos'], entry['etag']
+
+def invalidate_catalog():
+    global _catalog_generation
+    with _catalog_lock:
+        _catalog_generation += 1
+        _catalog_cache.clear()
+
 # Routes
 @app.route('/')
 def home():
-    return render_template('index.html')
+    # Ship the first page with the HTML so the shelves render without a second request
+    try:
+        initial_videos, etag = catalog_page(CATALOG_FIRST_PAGE_SIZE)
+        initial_etag = quote_etag(etag)
+    except Exception as e:
+        print(f"Error embedding catalog in /: {e}")
+        initial_videos, initial_etag = None, ''
+
+    return render_template('index.html',
+                           initial_videos=initial_videos,
+                           initial_etag=initial_etag,
+                           page_size=CATALOG_FIRST_PAGE_SIZE)
 
 @app.route('/upload', methods=['POST'])
+@admission.limit_uploads
 def upload_video():
+    temp_paths = []
     try:
         print("=== UPLOAD DEBUG START ===")
         print("AWS_BUCKET_NAME:", AWS_BUCKET_NAME)
@@ -102,10 +332,10 @@ def upload_video():
         
         file = request.files['video']
         title = request.form.get('title', 'Untitled')
-        category = request.form.get('category', 'General')
+        # Store the default rather than blank so the admin category filter finds it
+        category = (request.form.get('category') or '').strip() or 'General'
         
-        print("📁 File info:", file.filename, "Size:", len(file.read()) if file else 0)
-        file.seek(0)  # Reset file pointer
+        print("📁 File info:", file.filename)
         
         if file.filename == '':
             print("❌ Empty filename")
@@ -115,30 +345,48 @@ def upload_video():
             filename = secure_filename(file.filename)
             s3_key = f"videos/{filename}"
             
+            # Spool to disk so the MP4 can be remuxed without holding it in memory
+            fd, upload_path = tempfile.mkstemp(suffix='.' + filename.rsplit('.', 1)[1].lower())
+            os.close(fd)
+            temp_paths.append(upload_path)
+            file.save(upload_path)
+            print("📁 Size:", os.path.getsize(upload_path))
+            
+            upload_path, is_faststart = faststart.process(upload_path)
+            if upload_path not in temp_paths:
+                temp_paths.append(upload_path)
+            
             print("📤 Uploading to S3...")
             print("📦 Bucket:", AWS_BUCKET_NAME)
             print("📍 Key:", s3_key)
             
             # Upload to S3
+            s3_client = get_s3_client()
+            from boto3.exceptions import S3UploadFailedError
+            from botocore.exceptions import ClientError
             try:
-                s3_client.upload_fileobj(
-                    file,
+                s3_client.upload_file(
+                    upload_path,
                     AWS_BUCKET_NAME,
                     s3_key,
                     ExtraArgs={'ContentType': 'video/mp4'}
                 )
                 print("✅ S3 upload successful!")
-            except ClientError as e:
+            except (ClientError, S3UploadFailedError) as e:
                 print("❌ S3 upload failed:", str(e))
                 return jsonify({'error': f'S3 upload failed: {str(e)}'}), 500
             
             # Save to database
-            conn = sqlite3.connect('tawa.db')
+            conn = get_db()
             c = conn.cursor()
-            c.execute("INSERT INTO videos (title, filename, s3_key, category) VALUES (?, ?, ?, ?)", 
-                     (title, filename, s3_key, category))
+            c.execute("INSERT INTO videos (title, filename, s3_key, category, faststart, size_bytes) VALUES (?, ?, ?, ?, ?, ?)", 
+                     (title, filename, s3_key, category, is_faststart, os.path.getsize(upload_path)))
             conn.commit()
             conn.close()
+            invalidate_catalog()
+            if origin_cache is not None:
+                # Same filename means same key, so drop any stale cached blocks
+                origin_cache.forget(s3_key)
             
             # Generate the S3 URL for the response
             s3_url = f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
@@ -148,7 +396,8 @@ def upload_video():
                 'message': 'Video uploaded successfully to cloud!', 
                 'filename': filename,
                 's3_url': s3_url,
-                'category': category
+                'category': category,
+                'faststart': is_faststart
             })
         else:
             print("❌ File type not allowed")
@@ -158,36 +407,83 @@ def upload_video():
         print("💥 Unexpected error:", str(e))
         return jsonify({'error': str(e)}), 500
     finally:
+        for path in temp_paths:
+            if os.path.exists(path):
+                os.remove(path)
         print("=== UPLOAD DEBUG END ===")
 
 @app.route('/videos')
 def get_videos():
     try:
-        conn = sqlite3.connect('tawa.db')
-        c = conn.cursor()
-        c.execute("SELECT id, title, filename, s3_key, upload_date FROM videos ORDER BY upload_date DESC")
-        videos = c.fetchall()
-        conn.close()
-        
-        video_list = []
-        for video in videos:
-            # Generate S3 URL for each video
-            s3_url = f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{video[3]}"  # s3_key is at index 3
-            
-            video_list.append({
-                'id': video[0],        # id
-                'title': video[1],     # title
-                'filename': video[2],  # filename
-                's3_url': s3_url,      # generated URL
-                'upload_date': video[4] # upload_date at index 4
-            })
-        
-        return jsonify(video_list)
-    
+        limit = request.args.get('limit', type=int)
+        video_list, etag = catalog_page(limit)
     except Exception as e:
         print(f"Error in /videos: {e}")
         return jsonify([])  # Return empty array instead of crashing
 
+    response = jsonify(video_list)
+    response.set_etag(etag)
+    # Let browsers keep the body but always check back with us first
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/stream/<int:video_id>')
+def stream_video(video_id):
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT s3_key FROM videos WHERE id = ?", (video_id,))
+    row = c.fetchone()
+    conn.close()
+
+    if row is None or not row[0]:
+        return jsonify({'error': 'Video not found'}), 404
+
+    s3_key = row[0]
+    if origin_cache is None:
+        return redirect(f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{s3_key}")
+
+    from botocore.exceptions import BotoCoreError, ClientError
+    try:
+        info = origin_cache.object_info(s3_key)
+        size = info[0]
+    except ClientError as e:
+        print("❌ Origin lookup failed:", str(e))
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return jsonify({'error': 'Video not available'}), 404
+        return jsonify({'error': 'Video storage returned an error'}), 502
+    except BotoCoreError as e:
+        # No credentials, S3 unreachable, timeouts: our problem, not a missing video
+        print("❌ Origin unavailable:", str(e))
+        return jsonify({'error': 'Video storage is unavailable, try again shortly'}), 503
+
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'Content-Type': mimetypes.guess_type(s3_key)[0] or 'video/mp4',
+    }
+    status = 200
+    start, end = 0, size - 1
+
+    if request.range is not None:
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            headers['Content-Range'] = f'bytes */{size}'
+            return Response(status=416, headers=headers)
+        start, end = byte_range[0], byte_range[1] - 1
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        status = 206
+
+    headers['Content-Length'] = str(end - start + 1)
+    body = origin_cache.read_range(s3_key, start, end, info) if size else iter(())
+    return Response(body, status=status, headers=headers, direct_passthrough=True)
+
+@app.route('/metrics')
+def metrics():
+    """Per-worker counters; each gunicorn worker reports its own"""
+    stats = {'uploads': admission.stats()}
+    if origin_cache is not None:
+        stats['origin_cache'] = origin_cache.stats()
+    return jsonify(stats)
+
 @app.route('/sitemap.xml')
 def sitemap():
     sitemap_xml = '''<?xml version="1.0" encoding="UTF-8"?>
@@ -208,6 +504,173 @@ Allow: /
 Sitemap: https://tawa-streaming.onrender.com/sitemap.xml'''
     return robots_txt, 200, {'Content-Type': 'text/plain'}
 
+# Admin API
+ADMIN_SORTS = {'upload_date': 'upload_date', 'title': 'title'}
+ADMIN_PAGE_SIZE = 24
+ADMIN_MAX_PAGE_SIZE = 100
+
+def encode_cursor(value, video_id):
+    return base64.urlsafe_b64encode(json.dumps([value, video_id]).encode()).decode()
+
+def decode_cursor(cursor):
+    value, video_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    # Only values we could have issued ourselves may reach SQLite
+    if isinstance(value, bool) or not isinstance(value, (str, int, type(None))):
+        raise ValueError('bad cursor value')
+    if isinstance(video_id, bool) or not isinstance(video_id, int):
+        raise ValueError('bad cursor id')
+    return value, video_id
+
+@app.route('/admin/api/videos')
+def admin_list_videos():
+    """One page of videos; pass next_cursor back as ?cursor= for the following page"""
+    sort = request.args.get('sort', 'upload_date')
+    order = request.args.get('order', 'desc').lower()
+    category = request.args.get('category')
+    limit = min(max(request.args.get('limit', ADMIN_PAGE_SIZE, type=int), 1), ADMIN_MAX_PAGE_SIZE)
+
+    if sort not in ADMIN_SORTS or order not in ('asc', 'desc'):
+        return jsonify({'error': 'sort must be upload_date or title, order asc or desc'}), 400
+    column = ADMIN_SORTS[sort]
+
+    where, params = [], []
+    if category:
+        where.append("category = ?")
+        params.append(category)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            params.extend(decode_cursor(cursor))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        # Keyset pagination: seek past the last row instead of OFFSET-scanning
+        where.append(f"({column}, id) {'<' if order == 'desc' else '>'} (?, ?)")
+
+    sql = "SELECT id, title, filename, s3_key, category, upload_date, size_bytes, faststart FROM videos"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {column} {order}, id {order} LIMIT ?"
+
+    conn = get_db()
+    c = conn.cursor()
+    c.execute(sql, params + [limit + 1])
+    rows = c.fetchall()
+
+    total = None
+    if not cursor:
+        # Only the first page pays for the count
+        if category:
+            c.execute("SELECT COUNT(*) FROM videos WHERE category = ?", (category,))
+        else:
+            c.execute("SELECT COUNT(*) FROM videos")
+        total = c.fetchone()[0]
+    conn.close()
+
+    items = []
+    for row in rows[:limit]:
+        items.append({
+            'id': row[0],
+            'title': row[1],
+            'filename': row[2],
+            's3_url': f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{row[3]}",
+            'category': row[4] or 'General',
+            'upload_date': row[5],
+            'size_bytes': row[6],
+            'faststart': None if row[7] is None else bool(row[7])
+        })
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[1] if sort == 'title' else last[5], last[0])
+
+    return jsonify({'items': items, 'next_cursor': next_cursor, 'total': total})
+
+@app.route('/admin/api/aggregates')
+def admin_aggregates():
+    """Counts and storage per category plus uploads per day, all computed in SQL"""
+    days = min(max(request.args.get('days', 30, type=int), 1), 365)
+
+    conn = get_db()
+    c = conn.cursor()
+    # Grouping on the bare column lets SQLite answer from idx_videos_category_size
+    # unknown_size counts videos uploaded before sizes were recorded, so 'bytes' is a lower bound
+    c.execute('''
+        SELECT category, COUNT(*), COALESCE(SUM(size_bytes), 0), SUM(size_bytes IS NULL)
+        FROM videos GROUP BY category
+    ''')
+    totals = {}
+    for category, count, size, unknown in c.fetchall():
+        entry = totals.setdefault(category or 'General', {
+            'category': category or 'General', 'count': 0, 'bytes': 0, 'unknown_size': 0
+        })
+        entry['count'] += count
+        entry['bytes'] += size
+        entry['unknown_size'] += unknown
+    categories = sorted(totals.values(), key=lambda entry: entry['count'], reverse=True)
+
+    c.execute('''
+        SELECT date(upload_date) AS day, COUNT(*)
+        FROM videos WHERE upload_date >= date('now', ?)
+        GROUP BY day ORDER BY day
+    ''', (f'-{days - 1} days',))
+    counts = dict(c.fetchall())
+    conn.close()
+
+    # One entry per day, including days without uploads (SQLite's 'now' is UTC)
+    today = datetime.now(timezone.utc).date()
+    per_day = []
+    for offset in range(days - 1, -1, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        per_day.append({'day': day, 'count': counts.get(day, 0)})
+
+    return jsonify({
+        'total_videos': sum(entry['count'] for entry in categories),
+        'total_bytes': sum(entry['bytes'] for entry in categories),
+        'unknown_size': sum(entry['unknown_size'] for entry in categories),
+        'categories': categories,
+        'uploads_per_day': per_day,
+        'days': days
+    })
+
+# Profiling (needs PROFILE_TOKEN; each gunicorn worker keeps its own profiles)
+def require_profiling_token():
+    if not profiling.enabled():
+        abort(404)
+    if not profiling.authorized():
+        abort(403)
+
+@app.route('/admin/profiling', methods=['POST'])
+def arm_profiling():
+    """Profile the next N requests this worker serves"""
+    require_profiling_token()
+    armed = profiling.arm(request.args.get('requests', 1, type=int))
+    return jsonify({'armed': armed, 'pid': os.getpid()})
+
+@app.route('/admin/profiles')
+def list_profiles():
+    require_profiling_token()
+    return jsonify(profiling.summaries())
+
+@app.route('/admin/profiles/<profile_id>.collapsed')
+def download_collapsed_profile(profile_id):
+    require_profiling_token()
+    profile = profiling.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found on this worker'}), 404
+    return profiling.to_collapsed(profile), 200, {'Content-Type': 'text/plain'}
+
+@app.route('/admin/profiles/<profile_id>.speedscope.json')
+def download_speedscope_profile(profile_id):
+    require_profiling_token()
+    profile = profiling.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found on this worker'}), 404
+    response = jsonify(profiling.to_speedscope(profile))
+    response.headers['Content-Disposition'] = f'attachment; filename={profile_id}.speedscope.json'
+    return response
+
 # Admin route for private uploads
 @app.route('/admin')
 def admin_panel():
@@ -526,6 +989,70 @@ def admin_panel():
                 font-weight: 600;
             }
             
+            /* Overview */
+            .stats-grid {
+                display: grid;
+                grid-template-columns: repeat(auto-fill, minmax(220px, 1fr));
+                gap: 1.5rem;
+                margin-bottom: 1.5rem;
+            }
+            
+            .stat-card {
+                background: #1E293B;
+                border: 1px solid #334155;
+                border-radius: 8px;
+                padding: 1.2rem;
+            }
+            
+            .stat-value {
+                font-size: 1.8rem;
+                font-weight: bold;
+                color: #E2E8F0;
+            }
+            
+            .stat-label {
+                color: #94A3B8;
+                font-size: 0.9rem;
+            }
+            
+            .stat-row {
+                display: flex;
+                justify-content: space-between;
+                color: #CBD5E1;
+                font-size: 0.9rem;
+                padding: 0.3rem 0;
+                border-bottom: 1px solid #334155;
+            }
+            
+            .day-bars {
+                display: flex;
+                align-items: flex-end;
+                gap: 3px;
+                height: 80px;
+                margin-top: 0.8rem;
+            }
+            
+            .day-bar {
+                flex: 1;
+                background: #3B82F6;
+                border-radius: 2px 2px 0 0;
+                min-height: 2px;
+            }
+            
+            .sort-select {
+                background: #0F172A;
+                border: 1px solid #334155;
+                border-radius: 6px;
+                color: #E2E8F0;
+                padding: 0.4rem 0.6rem;
+            }
+            
+            .grid-status {
+                text-align: center;
+                color: #64748B;
+                padding: 2rem;
+            }
+            
             /* Footer */
             .admin-footer {
                 background: #0F172A;
@@ -599,6 +1126,31 @@ def admin_panel():
 
         <!-- Main Content -->
         <main class="admin-main">
+            <!-- Overview Section -->
+            <section class="section">
+                <div class="section-header">
+                    <h2 class="section-title">Library Overview</h2>
+                </div>
+                <div class="stats-grid">
+                    <div class="stat-card">
+                        <div class="stat-value" id="statTotal">–</div>
+                        <div class="stat-label">Videos</div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-value" id="statBytes">–</div>
+                        <div class="stat-label">Storage used</div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-label">By category</div>
+                        <div id="statCategories"></div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-label">Uploads, last 30 days</div>
+                        <div class="day-bars" id="statDays"></div>
+                    </div>
+                </div>
+            </section>
+
             <!-- Recent Uploads Section -->
             <section class="section">
                 <div class="section-header">
@@ -614,11 +1166,17 @@ def admin_panel():
             <section class="section">
                 <div class="section-header">
                     <h2 class="section-title">All Videos</h2>
-                    <a class="view-all">View All</a>
+                    <select class="sort-select" id="sortSelect">
+                        <option value="upload_date:desc">Newest first</option>
+                        <option value="upload_date:asc">Oldest first</option>
+                        <option value="title:asc">Title A–Z</option>
+                        <option value="title:desc">Title Z–A</option>
+                    </select>
                 </div>
                 <div class="videos-grid" id="allVideos">
-                    <!-- All videos will be loaded here -->
+                    <!-- All videos are loaded here a page at a time -->
                 </div>
+                <div class="grid-status" id="allVideosStatus"></div>
             </section>
         </main>
 
@@ -749,55 +1307,185 @@ def admin_panel():
                 }
             });
             
-            // Load videos
-            async function loadVideos() {
+            // Listing state for the "All Videos" grid
+            const PAGE_SIZE = 24;
+            let nextCursor = null;
+            let loadingPage = false;
+            let listGeneration = 0;
+            
+            function formatBytes(bytes) {
+                const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+                let value = bytes || 0;
+                let unit = 0;
+                while (value >= 1024 && unit < units.length - 1) {
+                    value /= 1024;
+                    unit++;
+                }
+                return value.toFixed(unit ? 1 : 0) + ' ' + units[unit];
+            }
+            
+            // Videos uploaded before sizes were recorded count as unknown, not 0 B
+            function formatSize(bytes, unknown) {
+                if (!unknown) return formatBytes(bytes);
+                const known = bytes ? formatBytes(bytes) + '+' : 'Size unknown';
+                return known + ' (' + unknown + ' unsized)';
+            }
+            
+            // Build a card with DOM nodes so titles are never parsed as HTML
+            function createVideoCard(video) {
+                const card = document.createElement('div');
+                card.className = 'video-card';
+                card.innerHTML = `
+                    <div class="video-thumbnail">🎥</div>
+                    <div class="video-info">
+                        <div class="video-title"></div>
+                        <div class="video-meta">
+                            <span class="video-category"></span>
+                            <span class="video-date"></span>
+                        </div>
+                    </div>
+                `;
+                card.querySelector('.video-title').textContent = video.title;
+                card.querySelector('.video-category').textContent = video.category;
+                card.querySelector('.video-date').textContent = new Date(video.upload_date).toLocaleDateString();
+                return card;
+            }
+            
+            function emptyMessage(text) {
+                const div = document.createElement('div');
+                div.style.cssText = 'grid-column: 1/-1; text-align: center; color: #64748B; padding: 2rem;';
+                div.textContent = text;
+                return div;
+            }
+            
+            function listingUrl(params) {
+                const [sort, order] = document.getElementById('sortSelect').value.split(':');
+                const query = new URLSearchParams({ sort, order, limit: PAGE_SIZE, ...params });
+                return '/admin/api/videos?' + query.toString();
+            }
+            
+            // Load the overview numbers
+            async function loadAggregates() {
                 try {
-                    const response = await fetch('/videos');
-                    const videos = await response.json();
+                    const response = await fetch('/admin/api/aggregates?days=30');
+                    const stats = await response.json();
+                    
+                    document.getElementById('statTotal').textContent = stats.total_videos;
+                    document.getElementById('statBytes').textContent = formatSize(stats.total_bytes, stats.unknown_size);
                     
-                    const recentContainer = document.getElementById('recentVideos');
-                    const allContainer = document.getElementById('allVideos');
+                    const categories = document.getElementById('statCategories');
+                    categories.innerHTML = '';
+                    stats.categories.forEach(entry => {
+                        const row = document.createElement('div');
+                        row.className = 'stat-row';
+                        const name = document.createElement('span');
+                        name.textContent = entry.category;
+                        const value = document.createElement('span');
+                        value.textContent = entry.count + ' · ' + formatSize(entry.bytes, entry.unknown_size);
+                        row.append(name, value);
+                        categories.appendChild(row);
+                    });
                     
-                    if (videos.length === 0) {
-                        recentContainer.innerHTML = '<div style="grid-column: 1/-1; text-align: center; color: #64748B; padding: 2rem;">No videos uploaded yet</div>';
-                        allContainer.innerHTML = '<div style="grid-column: 1/-1; text-align: center; color: #64748B; padding: 2rem;">No videos uploaded yet</div>';
+                    const days = document.getElementById('statDays');
+                    days.innerHTML = '';
+                    const peak = Math.max(1, ...stats.uploads_per_day.map(entry => entry.count));
+                    stats.uploads_per_day.forEach(entry => {
+                        const bar = document.createElement('div');
+                        bar.className = 'day-bar';
+                        bar.style.height = (entry.count / peak * 100) + '%';
+                        bar.title = entry.day + ': ' + entry.count;
+                        days.appendChild(bar);
+                    });
+                } catch (error) {
+                    console.error('Error loading aggregates:', error);
+                }
+            }
+            
+            // Load the newest few for "Continue Managing"
+            async function loadRecent() {
+                const container = document.getElementById('recentVideos');
+                try {
+                    const response = await fetch('/admin/api/videos?limit=4');
+                    const page = await response.json();
+                    container.innerHTML = '';
+                    if (page.items.length === 0) {
+                        container.appendChild(emptyMessage('No videos uploaded yet'));
+                        return;
+                    }
+                    const fragment = document.createDocumentFragment();
+                    page.items.forEach(video => fragment.appendChild(createVideoCard(video)));
+                    container.appendChild(fragment);
+                } catch (error) {
+                    console.error('Error loading recent videos:', error);
+                }
+            }
+            
+            // Append the next page of "All Videos"; called again as the user scrolls
+            async function loadNextPage() {
+                if (loadingPage || nextCursor === undefined) {
+                    return;
+                }
+                loadingPage = true;
+                const generation = listGeneration;
+                const container = document.getElementById('allVideos');
+                const status = document.getElementById('allVideosStatus');
+                status.textContent = 'Loading...';
+                
+                try {
+                    const response = await fetch(listingUrl(nextCursor ? { cursor: nextCursor } : {}));
+                    const page = await response.json();
+                    if (generation !== listGeneration) {
+                        // The sort changed while we were waiting
                         return;
                     }
                     
-                    // Recent videos (last 4)
-                    const recentVideos = videos.slice(0, 4);
-                    recentContainer.innerHTML = recentVideos.map(video => `
-                        <div class="video-card">
-                            <div class="video-thumbnail">🎥</div>
-                            <div class="video-info">
-                                <div class="video-title">${video.title}</div>
-                                <div class="video-meta">
-                                    <span class="video-category">${video.category}</span>
-                                    <span>${new Date(video.upload_date).toLocaleDateString()}</span>
-                                </div>
-                            </div>
-                        </div>
-                    `).join('');
-                    
-                    // All videos
-                    allContainer.innerHTML = videos.map(video => `
-                        <div class="video-card">
-                            <div class="video-thumbnail">🎥</div>
-                            <div class="video-info">
-                                <div class="video-title">${video.title}</div>
-                                <div class="video-meta">
-                                    <span class="video-category">${video.category}</span>
-                                    <span>${new Date(video.upload_date).toLocaleDateString()}</span>
-                                </div>
-                            </div>
-                        </div>
-                    `).join('');
+                    if (!nextCursor && page.items.length === 0) {
+                        container.appendChild(emptyMessage('No videos uploaded yet'));
+                    }
+                    const fragment = document.createDocumentFragment();
+                    page.items.forEach(video => fragment.appendChild(createVideoCard(video)));
+                    container.appendChild(fragment);
                     
+                    nextCursor = page.next_cursor || undefined;
+                    status.textContent = nextCursor ? '' : (container.children.length ? 'End of library' : '');
                 } catch (error) {
                     console.error('Error loading videos:', error);
+                    status.textContent = 'Could not load videos';
+                } finally {
+                    if (generation === listGeneration) {
+                        loadingPage = false;
+                        // Keep filling until the grid reaches past the bottom of the screen
+                        if (nextCursor && status.getBoundingClientRect().top < window.innerHeight + 600) {
+                            loadNextPage();
+                        }
+                    }
                 }
             }
             
+            function resetAllVideos() {
+                listGeneration++;
+                loadingPage = false;
+                nextCursor = null;
+                document.getElementById('allVideos').innerHTML = '';
+                loadNextPage();
+            }
+            
+            // Load everything on the dashboard
+            function loadVideos() {
+                loadAggregates();
+                loadRecent();
+                resetAllVideos();
+            }
+            
+            document.getElementById('sortSelect').addEventListener('change', resetAllVideos);
+            
+            // Fetch the next page when the bottom of the grid comes into view
+            new IntersectionObserver(entries => {
+                if (entries[0].isIntersecting) {
+                    loadNextPage();
+                }
+            }, { rootMargin: '600px' }).observe(document.getElementById('allVideosStatus'));
+            
             // Load videos when page loads
             document.addEventListener('DOMContentLoaded', loadVideos);
             
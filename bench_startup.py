@@ -0,0 +1,129 @@
+"""Cold-start benchmark: import time of app.py and time to first byte of a fresh server
+
+Run `python bench_startup.py`; it exits non-zero when a median goes over its
+budget, so CI can run it as a check. Each run uses a fresh interpreter and a
+throwaway copy of the database, so nothing in the working tree changes.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'import_ms': elapsed * 1000,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'boto3_loaded': 'boto3' in sys.modules,
+}))
+'''
+
+
+def _env(workdir):
+    env = dict(os.environ)
+    env['DATABASE_PATH'] = os.path.join(workdir, 'tawa.db')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def measure_import(workdir):
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE],
+        cwd=ROOT, env=_env(workdir), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_ttfb(workdir, path, timeout=30):
+    """Milliseconds from launching `python app.py` to the first byte of GET path"""
+    port = _free_port()
+    env = _env(workdir)
+    env['PORT'] = str(port)
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, 'app.py'], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=timeout) as response:
+                    response.read(1)
+                    return (time.perf_counter() - start) * 1000
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError(f'app.py exited with code {server.returncode}')
+                time.sleep(0.005)
+        raise RuntimeError(f'no response from {path} within {timeout}s')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=400)
+    parser.add_argument('--ttfb-budget-ms', type=float, default=1500)
+    parser.add_argument('--paths', nargs='+', default=['/', '/robots.txt', '/sitemap.xml'])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tawa-bench-')
+    try:
+        if os.path.exists(os.path.join(ROOT, 'tawa.db')):
+            shutil.copy(os.path.join(ROOT, 'tawa.db'), workdir)
+
+        imports = [measure_import(workdir) for _ in range(args.runs)]
+        results = {
+            'import_ms': statistics.median(run['import_ms'] for run in imports),
+            'max_rss_mb': statistics.median(run['max_rss_mb'] for run in imports),
+            'boto3_loaded_at_import': any(run['boto3_loaded'] for run in imports),
+            'ttfb_ms': {
+                path: statistics.median(measure_ttfb(workdir, path) for _ in range(args.runs))
+                for path in args.paths
+            },
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"import app:      {results['import_ms']:.0f} ms (budget {args.import_budget_ms:.0f} ms), "
+          f"{results['max_rss_mb']:.0f} MB RSS, boto3 loaded: {results['boto3_loaded_at_import']}")
+    for path, ttfb in results['ttfb_ms'].items():
+        print(f"first byte {path:<12} {ttfb:.0f} ms (budget {args.ttfb_budget_ms:.0f} ms)")
+
+    failures = []
+    if results['import_ms'] > args.import_budget_ms:
+        failures.append('import time')
+    if results['boto3_loaded_at_import']:
+        failures.append('boto3 imported at startup')
+    failures += [f'first byte of {path}' for path, ttfb in results['ttfb_ms'].items()
+                 if ttfb > args.ttfb_budget_ms]
+
+    if failures:
+        print("❌ Over budget:", ', '.join(failures))
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Move the MP4 `moov` box in front of `mdat` so playback can start right away"""
+import os
+import struct
+
+# Boxes on the path from moov down to the chunk offset tables
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+# A moov this large means a broken file, not one worth holding in memory
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+FASTSTART_EXTENSIONS = {'mp4', 'mov', 'm4v'}
+
+_COPY_CHUNK = 1024 * 1024
+
+
+class FaststartError(ValueError):
+    """The file is not an MP4 we know how to rewrite safely"""
+
+
+def read_boxes(f, start, end):
+    """Yield (type, offset, size, header_size) for each box between start and end"""
+    offset = start
+    while offset < end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            raise FaststartError(f'truncated box header at {offset}')
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            largesize = f.read(8)
+            if len(largesize) < 8:
+                raise FaststartError(f'truncated box header at {offset}')
+            size = struct.unpack('>Q', largesize)[0]
+            header_size = 16
+        elif size == 0:
+            # Box runs to the end of the file
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise FaststartError(f'bad {box_type!r} box size {size} at {offset}')
+        yield box_type, offset, size, header_size
+        offset += size
+
+
+def top_level_boxes(path):
+    with open(path, 'rb') as f:
+        return list(read_boxes(f, 0, os.path.getsize(path)))
+
+
+def is_faststart(path):
+    """True if moov precedes mdat, False if it follows, None if this isn't a plain MP4"""
+    try:
+        types = [box[0] for box in top_level_boxes(path)]
+    except FaststartError:
+        return None
+    if b'moov' not in types or b'mdat' not in types:
+        return None
+    return types.index(b'moov') < types.index(b'mdat')
+
+
+def _rewrite_moov(data, shift, to_co64):
+    """Return the box bytes in data with every chunk offset passed through shift()"""
+    out = []
+    offset = 0
+    while offset < len(data):
+        if offset + 8 > len(data):
+            raise FaststartError('truncated box header inside moov')
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header_size = 8
+        if size == 1:
+            if offset + 16 > len(data):
+                raise FaststartError('truncated box header inside moov')
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header_size = 16
+        if size < header_size or offset + size > len(data):
+            raise FaststartError(f'bad {box_type!r} box inside moov')
+        payload = data[offset + header_size:offset + size]
+
+        if box_type in CONTAINER_BOXES:
+            payload = _rewrite_moov(payload, shift, to_co64)
+        elif box_type in (b'stco', b'co64'):
+            box_type, payload = _rewrite_chunk_offsets(box_type, payload, shift, to_co64)
+
+        out.append(_box(box_type, payload))
+        offset += size
+    return b''.join(out)
+
+
+def _rewrite_chunk_offsets(box_type, payload, shift, to_co64):
+    if len(payload) < 8:
+        raise FaststartError(f'truncated {box_type!r} box')
+    version_flags, count = struct.unpack_from('>4sI', payload)
+    wide = box_type == b'co64'
+    if 8 + count * (8 if wide else 4) > len(payload):
+        raise FaststartError(f'{box_type!r} claims {count} entries but is too short')
+    offsets = struct.unpack_from(f'>{count}{"Q" if wide else "I"}', payload, 8)
+    offsets = [shift(o) for o in offsets]
+
+    if not wide and (to_co64 or (offsets and max(offsets) > 0xFFFFFFFF)):
+        if not to_co64:
+            raise OverflowError('chunk offset no longer fits in stco')
+        box_type, wide = b'co64', True
+
+    table = struct.pack(f'>{count}{"Q" if wide else "I"}', *offsets)
+    return box_type, struct.pack('>4sI', version_flags, count) + table
+
+
+def _box(box_type, payload):
+    size = len(payload) + 8
+    if size > 0xFFFFFFFF:
+        return struct.pack('>I4sQ', 1, box_type, size + 8) + payload
+    return struct.pack('>I4s', size, box_type) + payload
+
+
+def _copy_range(src, dst, start, end):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(_COPY_CHUNK, remaining))
+        if not chunk:
+            raise FaststartError('file ended early while copying')
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def make_faststart(src_path, dst_path):
+    """Write a faststart copy of src_path to dst_path; returns False if nothing needed doing"""
+    boxes = top_level_boxes(src_path)
+    types = [box[0] for box in boxes]
+    if b'moov' not in types or b'mdat' not in types:
+        raise FaststartError('no moov/mdat boxes')
+    if b'moof' in types:
+        # Fragmented files carry their own offsets; leave them alone
+        raise FaststartError('fragmented MP4')
+
+    moov_index, mdat_index = types.index(b'moov'), types.index(b'mdat')
+    if moov_index < mdat_index:
+        return False
+
+    _, moov_offset, moov_size, _ = boxes[moov_index]
+    mdat_offset = boxes[mdat_index][1]
+    if moov_size > MAX_MOOV_BYTES:
+        raise FaststartError(f'moov box too large ({moov_size} bytes)')
+
+    with open(src_path, 'rb') as src:
+        src.seek(moov_offset)
+        moov = src.read(moov_size)
+
+        def rewrite(new_size, to_co64):
+            def shift(o):
+                # Data before the old moov moves down by the new moov; data after it
+                # moves by the difference in size
+                return o + new_size if o < moov_offset else o + new_size - moov_size
+            return _rewrite_moov(moov, shift, to_co64)
+
+        def rewrite_to_fit(to_co64):
+            # The rewritten moov can differ in size from the original (64-bit box
+            # headers become 32-bit, stco may widen to co64), but never by an
+            # amount that depends on the shift, so size it first and then shift by it
+            return rewrite(len(rewrite(0, to_co64)), to_co64)
+
+        try:
+            try:
+                new_moov = rewrite_to_fit(to_co64=False)
+            except OverflowError:
+                new_moov = rewrite_to_fit(to_co64=True)
+        except struct.error as e:
+            raise FaststartError(f'malformed moov: {e}')
+
+        with open(dst_path, 'wb') as dst:
+            _copy_range(src, dst, 0, mdat_offset)
+            dst.write(new_moov)
+            _copy_range(src, dst, mdat_offset, moov_offset)
+            _copy_range(src, dst, moov_offset + moov_size, os.path.getsize(src_path))
+    return True
+
+
+def process(path):
+    """Make the upload at path faststart if we can; returns (path_to_upload, faststart)
+
+    faststart is None for formats this doesn't apply to. A rewritten copy is
+    written next to the original as `<path>.faststart`; the caller removes both.
+    """
+    if path.rsplit('.', 1)[-1].lower() not in FASTSTART_EXTENSIONS:
+        return path, None
+
+    dst_path = path + '.faststart'
+    try:
+        if make_faststart(path, dst_path):
+            print("⚡ Moved moov atom to the front for faststart playback")
+            return dst_path, True
+        return path, True
+    except FaststartError as e:
+        print("⚠️ Skipping faststart:", e)
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        return path, is_faststart(path)
@@ -0,0 +1,90 @@
+"""Gunicorn settings for production; every value can be overridden from the environment"""
+import os
+
+# gthread (default) or gevent; gevent needs `pip install gevent`
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before anything imports ssl (boto3 does), otherwise TLS to S3 breaks
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def _cpu_count():
+    """CPUs we may actually use, honouring a cgroup quota (Render, Docker)"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _memory_limit_mb():
+    """Memory available to the service in MB, or None if we can't tell"""
+    for path in ('/sys/fs/cgroup/memory.max',
+                 '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            # cgroup v1 reports a huge number when unlimited
+            if value != 'max' and int(value) < 1 << 50:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _default_workers():
+    # The usual 2 x CPU + 1, but never more than the memory can hold
+    workers = 2 * _cpu_count() + 1
+    memory_mb = _memory_limit_mb()
+    if memory_mb:
+        per_worker_mb = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', 150))
+        workers = min(workers, int(memory_mb * 0.8) // per_worker_mb)
+    return max(1, workers)
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY') or _default_workers())
+threads = int(os.environ.get('GUNICORN_THREADS') or (4 if worker_class == 'gthread' else 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))  # gevent only
+
+# Load the app (and warm the catalog cache) once in the master; workers share it copy-on-write
+preload_app = True
+
+# Long enough for a large upload to reach S3; a stuck worker is still replaced
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers after a while, staggered so they don't all restart together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = '-'
+
+# Admission control sizes its upload slots from the real capacity
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(worker_connections if worker_class == 'gevent' else threads)
+
+
+def on_starting(server):
+    import app
+    app.init_db()
+    try:
+        app.catalog_page(app.CATALOG_FIRST_PAGE_SIZE)
+    except Exception as e:
+        print("⚠️ Could not warm catalog cache:", e)
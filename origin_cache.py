@@ -0,0 +1,259 @@
+"""Read-through disk cache for hot S3 objects, kept in fixed-size aligned blocks"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class _Flight:
+    """A block fetch in progress that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+class OriginCache:
+    """Serves byte ranges of S3 objects from local disk, fetching missing blocks once
+
+    `get_client` returns anything with boto3's `head_object`/`get_object`, so a
+    local S3 stand-in (MinIO, moto) or a plain fake can be dropped in.
+
+    The directory is the only shared state between gunicorn workers: each
+    object's size and ETag sit in a `.meta` file next to its blocks, blocks are
+    named after the ETag so an overwritten object never mixes with old blocks,
+    and recency is the block's mtime (touched on every hit). Whichever worker
+    has written another slice of the budget rescans the directory and deletes
+    the least recently used blocks until the total is back under `max_bytes`.
+    """
+
+    def __init__(self, get_client, bucket, cache_dir, max_bytes, block_size=1024 * 1024,
+                 meta_ttl=300):
+        self.get_client = get_client
+        self.bucket = bucket
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.meta_ttl = meta_ttl
+
+        # Rescan after writing this much, so all workers together overshoot by little
+        self._scan_every = max(block_size, max_bytes // 20)
+        self._written_since_scan = 0
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._inflight = {}
+        self._cached_bytes = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'bytes_from_cache': 0,
+            'bytes_from_origin': 0,
+            'evictions': 0,
+        }
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._enforce_budget()
+
+    def _path(self, name):
+        digest = hashlib.sha1(name.encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def _meta_path(self, key):
+        return self._path(f'{self.bucket}/{key}') + '.meta'
+
+    def _block_path(self, key, etag, index):
+        return f"{self._path(f'{self.bucket}/{key}/{etag}')}-{index}"
+
+    def object_info(self, key):
+        """(size, etag) of the S3 object, re-checked with HEAD once meta_ttl runs out"""
+        path = self._meta_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) < self.meta_ttl:
+                with open(path) as f:
+                    meta = json.load(f)
+                return meta['size'], meta['etag']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        head = self.get_client().head_object(Bucket=self.bucket, Key=key)
+        size, etag = head['ContentLength'], head.get('ETag', '').strip('"')
+        self._write_file(path, json.dumps({'size': size, 'etag': etag}).encode())
+        return size, etag
+
+    def object_size(self, key):
+        return self.object_info(key)[0]
+
+    def forget(self, key):
+        """Make every worker re-check key, e.g. after the object was overwritten"""
+        # Old blocks are named after the old ETag, so they are never served again
+        # and age out of the LRU on their own
+        try:
+            os.remove(self._meta_path(key))
+        except FileNotFoundError:
+            pass
+
+    def read_range(self, key, start, end, info=None):
+        """Yield bytes start..end (inclusive) of the object, block by block"""
+        size, etag = info or self.object_info(key)
+        first, last = start // self.block_size, end // self.block_size
+        for index in range(first, last + 1):
+            data = self._get_block(key, size, etag, index)
+            offset = index * self.block_size
+            yield data[max(start - offset, 0):end - offset + 1]
+
+    def _read_cached(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # Mark as recently used for every worker's eviction pass
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _get_block(self, key, size, etag, index):
+        path = self._block_path(key, etag, index)
+        data = self._read_cached(path)
+        if data is not None:
+            self._count(hits=1, bytes_from_cache=len(data))
+            return data
+
+        with self._lock:
+            flight = self._inflight.get(path)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[path] = _Flight()
+
+        if not leader:
+            # Someone is already fetching this block; wait for their copy
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self._count(coalesced=1, bytes_from_cache=len(flight.data))
+            return flight.data
+
+        try:
+            data = self._fetch_block(key, size, etag, index)
+            self._store(path, data)
+            flight.data = data
+            self._count(misses=1, bytes_from_origin=len(data))
+            return data
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[path]
+            flight.done.set()
+
+    def _fetch_block(self, key, size, etag, index):
+        start = index * self.block_size
+        end = min(size, start + self.block_size) - 1
+        kwargs = {'Bucket': self.bucket, 'Key': key, 'Range': f'bytes={start}-{end}'}
+        if etag:
+            # Fail rather than cache bytes from a newer version under the old name
+            kwargs['IfMatch'] = etag
+        return self.get_client().get_object(**kwargs)['Body'].read()
+
+    def _write_file(self, path, data):
+        """Write atomically, so readers in other workers only ever see whole files"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("⚠️ Could not write to origin cache:", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def _store(self, path, data):
+        if not self._write_file(path, data):
+            return
+        with self._lock:
+            self._written_since_scan += len(data)
+            due = self._written_since_scan >= self._scan_every
+            if due:
+                self._written_since_scan = 0
+        if due:
+            self._enforce_budget()
+
+    def _enforce_budget(self):
+        """Measure the shared directory and delete least recently used blocks past max_bytes"""
+        if not self._evict_lock.acquire(blocking=False):
+            return  # another thread in this worker is already on it
+        try:
+            now = time.time()
+            blocks, total = [], 0
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    if name.endswith('.meta'):
+                        # Metadata for objects nobody has asked about in a while
+                        if now - st.st_mtime > self.meta_ttl * 10:
+                            self._remove(path)
+                        continue
+                    if name.endswith('.tmp'):
+                        # Left behind by a worker that died mid-write
+                        if now - st.st_mtime > 3600:
+                            self._remove(path)
+                        continue
+                    blocks.append((st.st_mtime, path, st.st_size))
+                    total += st.st_size
+
+            evicted = 0
+            for _, path, size in sorted(blocks):
+                if total <= self.max_bytes:
+                    break
+                if self._remove(path):
+                    evicted += 1
+                total -= size
+
+            with self._lock:
+                self._cached_bytes = total
+                self._stats['evictions'] += evicted
+        finally:
+            self._evict_lock.release()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            # Another worker got there first
+            return False
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._stats[name] += delta
+
+    def stats(self):
+        """Hit ratio and bytes saved for this worker, plus shared cache occupancy"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            # As of this worker's last scan of the shared directory
+            snapshot['cached_bytes'] = self._cached_bytes
+        snapshot['max_bytes'] = self.max_bytes
+        snapshot['block_size'] = self.block_size
+        lookups = snapshot['hits'] + snapshot['misses'] + snapshot['coalesced']
+        snapshot['hit_ratio'] = round((lookups - snapshot['misses']) / lookups, 4) if lookups else None
+        # Every byte not pulled from S3 again is egress we did not pay for
+        snapshot['bytes_saved'] = snapshot['bytes_from_cache']
+        return snapshot
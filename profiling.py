@@ -0,0 +1,216 @@
+"""On-demand request profiling with a sampling stack profiler
+
+A request is profiled when it carries `X-Profile-Token: <PROFILE_TOKEN>`, when
+an admin has armed the next few requests, or when the random sampler picks it
+(PROFILE_SAMPLE_RATE). While it runs, a helper thread snapshots the handler
+thread's Python stack every PROFILE_INTERVAL_MS, so time spent inside boto3 and
+in sqlite3 calls shows up under the frames that made them. Each sample is
+weighted by the time since the previous one: a handler holding the GIL delays
+the sampler, and a fixed weight per sample would under-count it. Finished
+profiles go into a small per-worker ring buffer and can be downloaded as
+collapsed stacks in microseconds (flamegraph.pl, speedscope) or speedscope JSON.
+
+Without PROFILE_TOKEN nothing is profiled at all, since the downloads need it;
+with no header, nothing armed and a zero sample rate, the only per-request cost
+is a couple of attribute checks. Sampling needs real threads, so use gthread
+(not gevent) workers while profiling.
+"""
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from flask import request
+
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 2))
+PROFILE_BUFFER_SIZE = int(os.environ.get('PROFILE_BUFFER_SIZE', 20))
+
+TOKEN_HEADER = 'X-Profile-Token'
+
+_profiles = deque(maxlen=PROFILE_BUFFER_SIZE)
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_armed = 0
+
+
+class _Sampler(threading.Thread):
+    """Adds up the milliseconds spent in each distinct stack on one thread until stopped"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='tawa-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.samples = Counter()
+        self.sample_count = 0
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            now = time.perf_counter()
+            # The wait overruns whenever the handler holds the GIL, so charge
+            # the whole gap to what it was running, not a nominal interval
+            elapsed_ms, last = (now - last) * 1000, now
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                # Root first, the way flamegraphs read
+                self.samples[tuple(reversed(stack))] += elapsed_ms
+                self.sample_count += 1
+
+
+def enabled():
+    return bool(PROFILE_TOKEN)
+
+
+def authorized():
+    """True if the request carries the profiling token in its header"""
+    # Header only: query strings end up in the access log
+    supplied = request.headers.get(TOKEN_HEADER, '')
+    return enabled() and hmac.compare_digest(supplied.encode(), PROFILE_TOKEN.encode())
+
+
+def arm(count):
+    """Profile the next `count` requests this worker handles"""
+    global _armed
+    with _lock:
+        _armed = max(0, count)
+        return _armed
+
+
+def _take_armed():
+    global _armed
+    with _lock:
+        if _armed <= 0:
+            return False
+        _armed -= 1
+        return True
+
+
+def maybe_start():
+    """Start profiling the current request if something asked for it; returns a handle or None"""
+    # Profiles can only be downloaded with the token, so don't collect any without it
+    if not enabled():
+        return None
+    if request.path.startswith('/admin/profil'):
+        return None
+
+    if TOKEN_HEADER in request.headers and authorized():
+        trigger = 'header'
+    elif _armed and _take_armed():
+        trigger = 'armed'
+    elif PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        trigger = 'sampled'
+    else:
+        return None
+
+    sampler = _Sampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000.0)
+    sampler.start()
+    return {
+        'id': f'{os.getpid()}-{next(_ids)}',
+        'method': request.method,
+        'path': request.path,
+        'trigger': trigger,
+        'started_at': time.time(),
+        'start': time.perf_counter(),
+        'sampler': sampler,
+    }
+
+
+def finish(handle, status=None):
+    """Stop the sampler and keep the profile in the ring buffer"""
+    sampler = handle.pop('sampler')
+    sampler.stopped.set()
+    sampler.join()
+
+    handle['duration_ms'] = round((time.perf_counter() - handle.pop('start')) * 1000, 2)
+    handle['status'] = status
+    handle['interval_ms'] = PROFILE_INTERVAL_MS
+    handle['sample_count'] = sampler.sample_count
+    handle['samples'] = sampler.samples
+    with _lock:
+        _profiles.append(handle)
+    print(f"🔬 Profiled {handle['method']} {handle['path']} in {handle['duration_ms']} ms ({handle['id']})")
+
+
+def summaries():
+    """Newest first, without the stacks"""
+    return [
+        {key: value for key, value in profile.items() if key != 'samples'}
+        | {'sampled_ms': round(sum(profile['samples'].values()), 2)}
+        for profile in reversed(_snapshot())
+    ]
+
+
+def _snapshot():
+    # Other threads append while we read; iterating the deque itself could raise
+    with _lock:
+        return list(_profiles)
+
+
+def get(profile_id):
+    for profile in _snapshot():
+        if profile['id'] == profile_id:
+            return profile
+    return None
+
+
+def _frame_label(frame):
+    name, filename, line = frame
+    marker = f'site-packages{os.sep}'
+    if marker in filename:
+        filename = filename.split(marker, 1)[1]
+    else:
+        filename = os.path.relpath(filename) if os.path.isabs(filename) else filename
+    return f'{name} ({filename}:{line})'
+
+
+def to_collapsed(profile):
+    """Brendan Gregg's folded format: `root;child;leaf microseconds` per line"""
+    lines = []
+    for stack, ms in profile['samples'].most_common():
+        lines.append(';'.join(_frame_label(frame) for frame in stack) + f' {round(ms * 1000)}')
+    return '\n'.join(lines) + '\n'
+
+
+def to_speedscope(profile):
+    """The profile as a speedscope sampled-profile document"""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, ms in profile['samples'].items():
+        sample = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(round(ms, 3))
+
+    name = f"{profile['method']} {profile['path']} ({profile['id']})"
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'tawa-streaming',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
@@ -0,0 +1,82 @@
+import struct
+
+import faststart
+
+
+def box(box_type, payload, largesize=False):
+    if largesize:
+        return struct.pack('>I4sQ', 1, box_type, len(payload) + 16) + payload
+    return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+
+def stco(offsets, count=None):
+    count = len(offsets) if count is None else count
+    table = b''.join(struct.pack('>I', o) for o in offsets)
+    return box(b'stco', struct.pack('>4sI', b'\0' * 4, count) + table)
+
+
+def moov(chunk_table, largesize_child=False):
+    stbl = box(b'stbl', box(b'stsd', b'\0' * 16) + chunk_table)
+    trak = box(b'trak', box(b'mdia', box(b'minf', stbl)), largesize=largesize_child)
+    return box(b'moov', box(b'mvhd', b'\0' * 100) + trak)
+
+
+def write_moov_last(path, largesize_child=False, table=None):
+    """ftyp, then an mdat holding two marked chunks, then moov; returns the chunk markers"""
+    ftyp = box(b'ftyp', b'isom\0\0\0\0isom')
+    mdat = box(b'mdat', b'AAAA' + b'x' * 60 + b'BBBB')
+    first = len(ftyp) + 8
+    offsets = [first, first + 64]
+    path.write_bytes(ftyp + mdat + moov(table or stco(offsets), largesize_child))
+    return [b'AAAA', b'BBBB']
+
+
+def chunks_at_offsets(path):
+    data = path.read_bytes()
+    at = data.index(b'stco')
+    count = struct.unpack_from('>I', data, at + 8)[0]
+    offsets = struct.unpack_from(f'>{count}I', data, at + 12)
+    return [data[o:o + 4] for o in offsets]
+
+
+def test_moves_moov_first_and_shifts_chunk_offsets(tmp_path):
+    src = tmp_path / 'video.mp4'
+    markers = write_moov_last(src)
+    assert faststart.is_faststart(str(src)) is False
+
+    upload_path, is_faststart = faststart.process(str(src))
+
+    assert is_faststart is True
+    assert faststart.is_faststart(upload_path) is True
+    assert chunks_at_offsets(tmp_path / 'video.mp4.faststart') == markers
+
+
+def test_shift_accounts_for_64bit_box_headers_inside_moov(tmp_path):
+    src = tmp_path / 'video.mp4'
+    markers = write_moov_last(src, largesize_child=True)
+
+    upload_path, is_faststart = faststart.process(str(src))
+
+    assert is_faststart is True
+    assert chunks_at_offsets(tmp_path / 'video.mp4.faststart') == markers
+
+
+def test_stco_count_larger_than_payload_is_uploaded_untouched(tmp_path):
+    src = tmp_path / 'video.mp4'
+    write_moov_last(src, table=stco([16], count=1000))
+
+    upload_path, is_faststart = faststart.process(str(src))
+
+    assert upload_path == str(src)
+    assert is_faststart is False
+    assert not (tmp_path / 'video.mp4.faststart').exists()
+
+
+def test_truncated_box_inside_moov_is_uploaded_untouched(tmp_path):
+    src = tmp_path / 'video.mp4'
+    write_moov_last(src, table=stco([16]) + b'\0\0\0')
+
+    upload_path, is_faststart = faststart.process(str(src))
+
+    assert upload_path == str(src)
+    assert is_faststart is False
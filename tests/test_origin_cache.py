@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+from origin_cache import OriginCache
+
+
+class FakeBody:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class FakeS3:
+    """Just enough of boto3's head_object/get_object, counting ranged reads"""
+
+    def __init__(self, objects, delay=0):
+        self.objects = objects  # key -> (bytes, etag)
+        self.delay = delay
+        self.heads = 0
+        self.gets = []
+        self.lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        data, etag = self.objects[Key]
+        with self.lock:
+            self.heads += 1
+        return {'ContentLength': len(data), 'ETag': f'"{etag}"'}
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        data, etag = self.objects[Key]
+        if IfMatch is not None and IfMatch != etag:
+            raise RuntimeError('PreconditionFailed')
+        with self.lock:
+            self.gets.append((Key, Range))
+        if self.delay:
+            time.sleep(self.delay)
+        start, end = (int(n) for n in Range[len('bytes='):].split('-'))
+        return {'Body': FakeBody(data[start:end + 1])}
+
+
+def make_cache(tmp_path, s3, max_bytes=1000, block_size=10):
+    return OriginCache(lambda: s3, 'bucket', str(tmp_path / 'cache'), max_bytes, block_size)
+
+
+def read(cache, key, start, end):
+    return b''.join(cache.read_range(key, start, end))
+
+
+def cached_bytes(tmp_path):
+    total = 0
+    for root, _, files in os.walk(tmp_path / 'cache'):
+        total += sum(os.path.getsize(os.path.join(root, name))
+                     for name in files if not name.endswith('.meta'))
+    return total
+
+
+def test_range_across_block_edges(tmp_path):
+    data = bytes(range(95))
+    s3 = FakeS3({'v.mp4': (data, 'e1')})
+    cache = make_cache(tmp_path, s3)
+
+    assert read(cache, 'v.mp4', 7, 23) == data[7:24]
+    assert read(cache, 'v.mp4', 10, 19) == data[10:20]
+    assert read(cache, 'v.mp4', 88, 94) == data[88:95]
+    assert read(cache, 'v.mp4', 0, 94) == data
+
+    # Each block came from S3 once, the last one short
+    assert sorted(s3.gets) == sorted(('v.mp4', f'bytes={i * 10}-{min(i * 10 + 9, 94)}') for i in range(10))
+    assert s3.heads == 1
+
+
+def test_concurrent_readers_fetch_each_block_once(tmp_path):
+    data = os.urandom(40)
+    s3 = FakeS3({'v.mp4': (data, 'e1')}, delay=0.05)
+    cache = make_cache(tmp_path, s3)
+    info = cache.object_info('v.mp4')
+
+    results = []
+    start = threading.Barrier(8)
+
+    def reader():
+        start.wait()
+        results.append(b''.join(cache.read_range('v.mp4', 0, 39, info)))
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [data] * 8
+    assert len(s3.gets) == 4
+    assert len(set(s3.gets)) == 4
+    assert cache.stats()['coalesced'] > 0
+
+
+def test_evicts_least_recently_used_blocks_past_max_bytes(tmp_path):
+    data = os.urandom(50)
+    s3 = FakeS3({'v.mp4': (data, 'e1')})
+    cache = make_cache(tmp_path, s3, max_bytes=30)
+    info = cache.object_info('v.mp4')
+
+    for index in range(3):
+        read(cache, 'v.mp4', index * 10, index * 10 + 9)
+    # Make block 1 the oldest, then hit block 0 so it counts as recently used
+    for index, age in ((0, 30), (1, 40), (2, 20)):
+        past = time.time() - age
+        os.utime(cache._block_path('v.mp4', 'e1', index), (past, past))
+    read(cache, 'v.mp4', 0, 9)
+
+    read(cache, 'v.mp4', 30, 39)
+
+    assert cached_bytes(tmp_path) <= 30
+    assert not os.path.exists(cache._block_path('v.mp4', 'e1', 1))
+    for index in (0, 2, 3):
+        assert os.path.exists(cache._block_path('v.mp4', 'e1', index))
+    assert cache.stats()['evictions'] == 1
+    assert read(cache, 'v.mp4', 0, 49) == data
+
+
+def test_forget_picks_up_a_new_etag(tmp_path):
+    s3 = FakeS3({'v.mp4': (b'a' * 25, 'e1')})
+    cache = make_cache(tmp_path, s3)
+    assert read(cache, 'v.mp4', 0, 24) == b'a' * 25
+
+    s3.objects['v.mp4'] = (b'b' * 30, 'e2')
+    cache.forget('v.mp4')
+
+    assert cache.object_info('v.mp4') == (30, 'e2')
+    assert read(cache, 'v.mp4', 0, 29) == b'b' * 30
+    assert s3.heads == 2
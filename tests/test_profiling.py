@@ -0,0 +1,65 @@
+import time
+
+from flask import Flask, g
+
+import profiling
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.before_request
+    def start():
+        g.profile = profiling.maybe_start()
+
+    @app.after_request
+    def tag(response):
+        if g.get('profile') is not None:
+            response.headers['X-Profile-Id'] = g.profile['id']
+        return response
+
+    @app.teardown_request
+    def finish(exc):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiling.finish(profile, 200)
+
+    @app.route('/busy')
+    def busy():
+        # Pure Python, so the handler holds the GIL the whole time
+        deadline = time.perf_counter() + 0.3
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+        return str(n)
+
+    return app
+
+
+def test_busy_handler_profile_adds_up_to_its_duration(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 'secret')
+    client = make_app().test_client()
+
+    response = client.get('/busy', headers={profiling.TOKEN_HEADER: 'secret'})
+    profile = profiling.get(response.headers['X-Profile-Id'])
+
+    speedscope = profiling.to_speedscope(profile)['profiles'][0]
+    total_ms = sum(speedscope['weights'])
+    assert total_ms == speedscope['endValue']
+    assert abs(total_ms - profile['duration_ms']) < profile['duration_ms'] * 0.25
+
+    collapsed_us = sum(int(line.rsplit(' ', 1)[1]) for line in profiling.to_collapsed(profile).splitlines())
+    assert abs(collapsed_us / 1000 - total_ms) < 1
+    assert any('busy' in line for line in profiling.to_collapsed(profile).splitlines())
+
+
+def test_nothing_is_profiled_without_a_token(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', '')
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(profiling, '_armed', 5)
+    client = make_app().test_client()
+
+    response = client.get('/busy')
+
+    assert 'X-Profile-Id' not in response.headers
+    assert profiling._armed == 5